@@ -3,13 +3,231 @@
 # to search for flights and retrieve information.
 
 import os
+import asyncio
 import calendar
-from datetime import datetime, timedelta
-from serpapi import GoogleSearch, serp_api_client_exception
+import itertools
+import logging
+import math
+import re
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+import diskcache
+import httpx
+import orjson
+import requests
+from aiolimiter import AsyncLimiter
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Handler/level configuration is left to the application (telegram_bot.py
+# calls logging.basicConfig); at INFO the per-day chatter in the hot monthly
+# loop costs nothing since it logs at DEBUG.
+logger = logging.getLogger(__name__)
+
+SERPAPI_URL = "https://serpapi.com/search.json"
+
+# Search-archive endpoint used to collect results submitted in async batch
+# mode (async=true): submissions return immediately with a search id, and the
+# finished payload is fetched from here once its status is "Success".
+SERPAPI_ARCHIVE_URL = "https://serpapi.com/searches/{search_id}.json"
+
+# How often to poll the search archive for a pending async search, and how
+# long to wait before giving up on it.
+_POLL_INTERVAL = 2.0
+_POLL_TIMEOUT = 60.0
+
+# Compiled once; a malformed code like "JFKK" should be rejected before the
+# month search fans out ~31 requests that have zero chance of succeeding.
+_IATA_RE = re.compile(r"[A-Z]{3}")
+
+
+@dataclass(slots=True)
+class Flight:
+    """
+    One parsed flight offer. Slots keep instances ~4x smaller than the
+    equivalent dict across a month's worth of offers, and attribute access
+    skips dict hashing in the min-price reduction.
+    """
+    airline: str | None
+    flight_number: str | None
+    price: float | None
+    departure_time: str | None
+    date: str | None = None
+
+# The key cannot change mid-process, so resolve it once at import time
+# (after load_dotenv) instead of hitting the environment on every call.
+_API_KEY = os.getenv("SERPAPI_KEY")
+
+# Constant query parameters shared by every search; per-call params are
+# merged on top of this dict.
+_BASE_PARAMS = {
+    "engine": "google_flights",
+    "api_key": _API_KEY,
+    "currency": "USD",  # Optional: specify currency
+    "hl": "en",         # Optional: specify language
+    "type": "2"         # Specify one-way trips
+}
+
+# Module-level session so keep-alive amortizes TCP+TLS handshakes across
+# calls instead of paying one handshake per request.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=30, max_retries=0))
+
+# Cap on how many daily searches may be in flight at once so a month-wide
+# fan-out does not slam SerpApi's rate limits.
+MAX_CONCURRENT_REQUESTS = 10
+
+# Token-bucket rate for the async fan-out: at most 5 submissions per second
+# regardless of how many tasks are ready to fire. The AsyncLimiter itself is
+# created per month search inside _search_month_async, because limiter
+# instances bind to the running event loop and asyncio.run gives every
+# search a fresh one - a module-level limiter breaks on the second search.
+_LIMITER_MAX_RATE = 5
+_LIMITER_TIME_PERIOD = 1
+
+# Consecutive rate-limit/quota failures tolerated before a month search stops
+# burning retries on the remaining days and returns its partial result.
+_BREAKER_FAIL_MAX = 3
+
+# Flight offers are stable over short windows, so identical
+# (origin, destination, date) lookups within the TTL skip the network and
+# re-parsing entirely. The cache stores the already-parsed flight lists.
+_RESULT_CACHE = TTLCache(maxsize=512, ttl=600)
+_RESULT_CACHE_LOCK = threading.Lock()
+
+# Persistent second-level cache so re-running a month search within the TTL
+# window (e.g. while developing/testing) survives process restarts and skips
+# SerpApi entirely. Stores the parsed flight lists, not raw JSON.
+_DISK_CACHE = diskcache.Cache("./.flight_cache")
+_DISK_CACHE_TTL = 600
+
+
+def _cache_key(origin_airport_code, destination_airport_code, search_date):
+    # Normalize casing so caller-side "eze" vs "EZE" doesn't fragment hits.
+    return (origin_airport_code.upper(), destination_airport_code.upper(), search_date)
+
+
+def _cache_get(key):
+    with _RESULT_CACHE_LOCK:
+        cached = _RESULT_CACHE.get(key)
+    if cached is not None:
+        return cached
+    cached = _DISK_CACHE.get("|".join(key))
+    if cached is not None:
+        # Promote disk hits into the in-process cache for cheap re-reads.
+        with _RESULT_CACHE_LOCK:
+            _RESULT_CACHE[key] = cached
+    return cached
+
+
+def _cache_set(key, flights):
+    with _RESULT_CACHE_LOCK:
+        _RESULT_CACHE[key] = flights
+    _DISK_CACHE.set("|".join(key), flights, expire=_DISK_CACHE_TTL)
+
+
+def close_resources():
+    """
+    Closes the module's long-lived resources: the pooled requests session
+    and the on-disk cache. Call once at process shutdown (e.g. from the
+    bot's post_shutdown hook).
+    """
+    _SESSION.close()
+    _DISK_CACHE.close()
+
+
+class SerpApiAuthError(Exception):
+    """Raised when SerpApi rejects the API key. Retrying cannot help."""
+
+
+class SerpApiTransientError(Exception):
+    """Raised for rate-limit (429) and server-side (5xx) responses worth retrying."""
+
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=1, max=30, jitter=0.5),
+    retry=retry_if_exception_type(
+        (SerpApiTransientError, requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+    ),
+    reraise=True,
+)
+def _request_serpapi(params):
+    """
+    Performs one SerpApi request with exponential-backoff retries.
+
+    Transient failures (429, 5xx, timeouts, connection errors) are retried up
+    to 3 times with jittered backoff so a rate-limited day in a month-long
+    search is not silently dropped. Auth failures raise SerpApiAuthError
+    immediately so the caller can fail fast.
+
+    Returns:
+        dict: The decoded JSON response.
+    """
+    response = _SESSION.get(SERPAPI_URL, params=params, timeout=10)
+    if response.status_code == 429 or response.status_code >= 500:
+        raise SerpApiTransientError(f"SerpApi returned HTTP {response.status_code}")
+
+    # orjson decodes the raw bytes 2-5x faster than the stdlib json module;
+    # responses with ~100 nested flight offers are large enough to notice.
+    results = orjson.loads(response.content)
+    error = results.get("error")
+    if error and "Invalid API key" in error:
+        raise SerpApiAuthError(error)
+    return results
+
+
+def _to_flight(flight_info):
+    """
+    Builds the Flight instance for one SerpApi flight offer.
+
+    Returns None for summarized offers without legs or a price, so callers
+    can filter them out without extra bookkeeping.
+    """
+    legs = flight_info.get("flights")
+    if isinstance(legs, list) and legs:
+        first_leg = legs[0] # Assuming we are interested in the first leg for simplicity
+        return Flight(
+            airline=first_leg.get("airline"),
+            flight_number=first_leg.get("flight_number"),
+            price=flight_info.get("price"), # Price is usually at the top level of the flight offer
+            departure_time=first_leg.get("departure_airport", {}).get("time")
+        )
+    if not legs and flight_info.get("price"):
+        # Summarized offers without detailed flight legs; keep them only if
+        # there's a price, to avoid adding empty entries.
+        return Flight(
+            airline=flight_info.get("airline_logo"), # Or some other identifier if airline name is not directly available
+            flight_number=None, # Flight number might not be available in summarized offers
+            price=flight_info.get("price"),
+            departure_time=None # Departure time might not be available
+        )
+    return None
+
+
+def _parse_serpapi_results(results):
+    """
+    Extracts a flat list of Flight instances from a raw SerpApi response dict.
+
+    Args:
+        results (dict): The decoded JSON response from the Google Flights engine.
+
+    Returns:
+        list: A list of Flight instances (possibly empty).
+    """
+    # SerpApi typically returns flight data in 'best_flights' or 'other_flights';
+    # chain them into one flat pass instead of looping per category.
+    all_offers = itertools.chain(
+        results.get("best_flights") or [],
+        results.get("other_flights") or []
+    )
+    return [flight for flight in map(_to_flight, all_offers) if flight is not None]
+
 
 def search_flights_api(origin_airport_code, destination_airport_code, search_date):
     """
@@ -21,80 +239,262 @@ def search_flights_api(origin_airport_code, destination_airport_code, search_dat
         search_date (str): The date of the flight in YYYY-MM-DD format (e.g., "2024-12-01").
 
     Returns:
-        list: A list of flight dictionaries, or an empty list if an error occurs or no flights are found.
+        list: A list of Flight instances, or an empty list if an error occurs or no flights are found.
     """
-    api_key = os.getenv("SERPAPI_KEY")
-    if not api_key:
-        print("Error: SERPAPI_KEY environment variable not found.")
+    key = _cache_key(origin_airport_code, destination_airport_code, search_date)
+    cached = _cache_get(key)
+    if cached is not None:
+        logger.debug("Cache hit for %s -> %s on %s.", origin_airport_code, destination_airport_code, search_date)
+        return cached
+
+    if not _API_KEY:
+        logger.error("SERPAPI_KEY environment variable not found.")
         return []
 
     params = {
-        "engine": "google_flights",
+        **_BASE_PARAMS,
         "departure_id": origin_airport_code,
         "arrival_id": destination_airport_code,
         "outbound_date": search_date,
-        "api_key": api_key,
-        "currency": "USD",  # Optional: specify currency
-        "hl": "en",         # Optional: specify language
-        "type": "2"         # Specify one-way trips
     }
 
-    print(f"Attempting to search flights using SerpApi with params: {params}")
+    logger.debug("Attempting to search flights using SerpApi with params: %s", params)
 
     try:
-        client = GoogleSearch(params)
-        results = client.get_dict()
+        # Hitting the endpoint directly through the pooled session guarantees
+        # connection reuse (the SerpApi SDK wraps requests but builds a fresh
+        # connection per call).
+        results = _request_serpapi(params)
 
         if "error" in results:
-            print(f"SerpApi Error: {results['error']}")
+            logger.error("SerpApi Error: %s", results['error'])
             return []
 
-        processed_flights = []
-        # SerpApi typically returns flight data in 'best_flights' or 'other_flights'
-        flight_categories = ["best_flights", "other_flights"]
-
-        for category in flight_categories:
-            if category in results and results[category]:
-                for flight_info in results[category]:
-                    # Ensure 'flights' key exists and is a list
-                    if "flights" in flight_info and isinstance(flight_info["flights"], list) and flight_info["flights"]:
-                        first_leg = flight_info["flights"][0] # Assuming we are interested in the first leg for simplicity
-                        flight_data = {
-                            "airline": first_leg.get("airline"),
-                            "flight_number": first_leg.get("flight_number"),
-                            "price": flight_info.get("price"), # Price is usually at the top level of the flight offer
-                            "departure_time": first_leg.get("departure_airport", {}).get("time")
-                        }
-                        processed_flights.append(flight_data)
-                    elif not flight_info.get("flights") : # Handle cases where a flight offer might not have detailed flight legs (e.g. summarized offers)
-                        flight_data = {
-                             "airline": flight_info.get("airline_logo"), # Or some other identifier if airline name is not directly available
-                             "flight_number": None, # Flight number might not be available in summarized offers
-                             "price": flight_info.get("price"),
-                             "departure_time": None # Departure time might not be available
-                        }
-                        # Add only if there's a price, to avoid adding empty entries if parsing fails for some offers
-                        if flight_data["price"]:
-                             processed_flights.append(flight_data)
-
+        processed_flights = _parse_serpapi_results(results)
 
         if not processed_flights and "message" in results: # Check for messages like "No flights found"
-            print(f"SerpApi Message: {results['message']}")
+            logger.info("SerpApi Message: %s", results['message'])
+
+        _cache_set(key, processed_flights)
 
         if processed_flights:
-            print(f"Successfully processed {len(processed_flights)} flights from SerpApi.")
+            logger.debug("Successfully processed %d flights from SerpApi.", len(processed_flights))
             return processed_flights
         else:
-            print("No flight data found in SerpApi response or failed to parse.")
+            logger.info("No flight data found in SerpApi response or failed to parse.")
             return []
 
-    except serp_api_client_exception as e:
-        print(f"SerpApi Client Error: {e}")
+    except SerpApiAuthError as e:
+        logger.error("SerpApi authentication error (not retried): %s", e)
+        return []
+    except (SerpApiTransientError, requests.exceptions.RequestException) as e:
+        logger.error("SerpApi request error (retries exhausted): %s", e)
         return []
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        logger.error("An unexpected error occurred: %s", e, exc_info=True)
         return []
 
+async def _submit_and_poll(client, limiter, params, search_date):
+    """
+    Runs one day's search in SerpApi's async batch mode.
+
+    The search is submitted with async=true (which returns immediately with a
+    search id instead of holding the connection open while Google Flights is
+    scraped), then the search archive is polled until the result is ready.
+    Submissions still respect the token bucket; archive polls are cheap and
+    paced by _POLL_INTERVAL.
+
+    Returns:
+        dict: The decoded JSON response for the finished search.
+    """
+    submit_params = {**params, "async": "true"}
+
+    for attempt in range(3):
+        async with limiter:
+            resp = await client.get(SERPAPI_URL, params=submit_params)
+            if resp.status_code == 429:
+                # Honor the server's Retry-After hint when present
+                # instead of blind exponential backoff.
+                retry_after = resp.headers.get("Retry-After")
+                delay = float(retry_after) if retry_after else float(2 ** attempt)
+                logger.warning("Rate limited for %s; retrying in %.1fs...", search_date, delay)
+                await asyncio.sleep(delay)
+                continue
+            results = orjson.loads(resp.content)
+        break
+    else:
+        raise SerpApiTransientError(f"Rate-limit retries exhausted for {search_date}")
+
+    metadata = results.get("search_metadata") or {}
+    if metadata.get("status") == "Success" or not metadata.get("id"):
+        # Either SerpApi answered from its own cache, or there is no search id
+        # to poll (e.g. an error payload); hand back what we got.
+        return results
+
+    archive_url = SERPAPI_ARCHIVE_URL.format(search_id=metadata["id"])
+    deadline = asyncio.get_running_loop().time() + _POLL_TIMEOUT
+    while True:
+        await asyncio.sleep(_POLL_INTERVAL)
+        resp = await client.get(archive_url, params={"api_key": _API_KEY})
+        results = orjson.loads(resp.content)
+        status = (results.get("search_metadata") or {}).get("status")
+        if status in ("Success", "Error"):
+            # "Error" payloads carry an "error" field the caller handles.
+            return results
+        if asyncio.get_running_loop().time() > deadline:
+            raise SerpApiTransientError(
+                f"Timed out waiting for async search {metadata['id']} ({search_date})"
+            )
+
+
+async def _fetch_day(client, sem, limiter, origin_airport_code, destination_airport_code, search_date):
+    """
+    Fetches one day's flights from SerpApi asynchronously.
+
+    Args:
+        client (httpx.AsyncClient): Shared client for connection reuse.
+        sem (asyncio.Semaphore): Bounds the number of concurrent requests.
+        limiter (AsyncLimiter): Token bucket pacing the submissions.
+        origin_airport_code (str): The IATA code for the origin airport.
+        destination_airport_code (str): The IATA code for the destination airport.
+        search_date (str): The date of the flight in YYYY-MM-DD format.
+
+    Returns:
+        tuple: (search_date, list of Flight instances for that date).
+    """
+    key = _cache_key(origin_airport_code, destination_airport_code, search_date)
+    cached = _cache_get(key)
+    if cached is not None:
+        logger.debug("Cache hit for %s -> %s on %s.", origin_airport_code, destination_airport_code, search_date)
+        # Entries written by the sync single-day path lack the 'date' stamp;
+        # the key pins the date, so stamping here is idempotent and safe.
+        for flight in cached:
+            flight.date = search_date
+        return search_date, cached
+
+    if not _API_KEY:
+        logger.error("SERPAPI_KEY environment variable not found.")
+        return search_date, []
+
+    params = {
+        **_BASE_PARAMS,
+        "departure_id": origin_airport_code,
+        "arrival_id": destination_airport_code,
+        "outbound_date": search_date,
+    }
+
+    async with sem:
+        logger.debug("Searching flights for %s...", search_date)
+        results = await _submit_and_poll(client, limiter, params, search_date)
+
+    if "error" in results:
+        error = results["error"]
+        if "Invalid API key" in error:
+            # Auth failures can never succeed on other days either.
+            raise SerpApiAuthError(error)
+        if "hasn't returned any results" in error:
+            # SerpApi reports a day with no flights as an error payload;
+            # that's a normal empty day, not a failure.
+            logger.debug("No results for %s: %s", search_date, error)
+            return search_date, []
+        # Anything else - quota exhaustion in particular - arrives as
+        # HTTP 200 with an error field. Raise so the caller's circuit
+        # breaker counts it instead of mistaking it for an empty day.
+        logger.error("SerpApi Error for %s: %s", search_date, error)
+        raise SerpApiTransientError(error)
+
+    daily_flights = _parse_serpapi_results(results)
+    # Stamp the date in place: the parser just created these dicts and nothing
+    # else references them, so no defensive copy is needed downstream.
+    for flight in daily_flights:
+        flight.date = search_date
+    _cache_set(key, daily_flights)
+    return search_date, daily_flights
+
+
+async def _search_month_async(origin_airport_code, destination_airport_code, year, month, num_days):
+    """
+    Issues all daily searches for a month concurrently and collects the results.
+
+    Returns:
+        list: Flight instances still in contention for the monthly minimum,
+              each augmented with its 'date'. Flights already priced above the
+              running minimum are never stored, so the buffer holds O(ties)
+              entries instead of every offer in the month.
+    """
+    sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    # Fresh limiter per run: it must live on the event loop this coroutine
+    # runs under, which asyncio.run recreates for every month search.
+    limiter = AsyncLimiter(max_rate=_LIMITER_MAX_RATE, time_period=_LIMITER_TIME_PERIOD)
+
+    # date.isoformat is C-implemented, so building all the day strings up
+    # front is cheaper than re-parsing an f-string format spec per task, and
+    # it hands the fan-out one ready-made string per day.
+    dates = [date(year, month, day).isoformat() for day in range(1, num_days + 1)]
+
+    candidates = []
+    running_min = math.inf
+
+    # SerpApi supports HTTP/2, so all daily requests multiplex over a single
+    # TCP/TLS connection instead of opening one per task.
+    limits = httpx.Limits(max_connections=20, max_keepalive_connections=20)
+    async with httpx.AsyncClient(http2=True, limits=limits, timeout=30.0) as client:
+        tasks = [
+            asyncio.create_task(
+                _fetch_day(client, sem, limiter, origin_airport_code, destination_airport_code, current_date_str)
+            )
+            for current_date_str in dates
+        ]
+        consecutive_failures = 0
+        # as_completed lets the running minimum shrink as soon as each day
+        # finishes, maximizing how many later offers can be skipped outright.
+        for future in asyncio.as_completed(tasks):
+            try:
+                _current_date_str, daily_flights = await future
+                consecutive_failures = 0
+            except SerpApiAuthError as e:
+                # A bad key fails for every remaining day; abort immediately.
+                logger.error("SerpApi authentication error; aborting month search: %s", e)
+                break
+            except SerpApiTransientError as e:
+                consecutive_failures += 1
+                logger.error("Error fetching a day's flights: %s", e)
+                if consecutive_failures >= _BREAKER_FAIL_MAX:
+                    # Circuit breaker: persistent rate-limit/quota failure,
+                    # so stop burning retries on the remaining days.
+                    logger.error(
+                        "%d consecutive SerpApi failures; "
+                        "aborting remaining days and returning partial results.",
+                        consecutive_failures,
+                    )
+                    break
+                continue
+            except Exception as e:
+                logger.error("Error fetching a day's flights: %s", e)
+                continue
+
+            for flight in daily_flights:
+                price = flight.price
+                if not isinstance(price, (int, float)) or price > running_min:
+                    continue
+                if price < running_min:
+                    running_min = price
+                    # A new strict minimum makes previously stored pricier
+                    # entries dead weight; evict them.
+                    candidates = [f for f in candidates if f.price <= price]
+                # _fetch_day already stamped 'date' on each flight, so the
+                # dicts can be appended as-is without a defensive copy.
+                candidates.append(flight)
+
+        # Cancel anything still outstanding (a no-op for finished tasks) and
+        # drain so cancellations settle before the client closes.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return candidates
+
+
 def find_cheapest_flights_in_month(origin_airport_code, destination_airport_code, year_month_str):
     """
     Finds the cheapest flight(s) in a given month by checking each day.
@@ -105,54 +505,59 @@ def find_cheapest_flights_in_month(origin_airport_code, destination_airport_code
         year_month_str (str): The month to search in "YYYY-MM" format.
 
     Returns:
-        list: A list of the cheapest flight dictionaries found, including their date.
+        list: A list of the cheapest Flight instances found, including their date.
               Returns an empty list if no flights are found or an error occurs.
     """
+    # Front-gate the airport codes so a typo doesn't fan out a month's worth
+    # of doomed API calls.
+    origin_airport_code = origin_airport_code.upper()
+    destination_airport_code = destination_airport_code.upper()
+    if not (_IATA_RE.fullmatch(origin_airport_code) and _IATA_RE.fullmatch(destination_airport_code)):
+        logger.error(
+            "Invalid IATA code(s): %r / %r. Expected 3-letter airport codes.",
+            origin_airport_code, destination_airport_code,
+        )
+        return []
+
     try:
         year, month = map(int, year_month_str.split('-'))
     except ValueError:
-        print(f"Error: Invalid year_month_str format: {year_month_str}. Please use YYYY-MM.")
+        logger.error("Invalid year_month_str format: %s. Please use YYYY-MM.", year_month_str)
         return []
 
     num_days = calendar.monthrange(year, month)[1]
-    all_flights_for_month = []
 
-    print(f"\nSearching for all flights in {year_month_str} from {origin_airport_code} to {destination_airport_code}...")
-
-    for day in range(1, num_days + 1):
-        current_date_str = f"{year:04d}-{month:02d}-{day:02d}"
-        print(f"Searching flights for {current_date_str}...")
-
-        # Ensure SERPAPI_KEY is checked within the loop or rely on search_flights_api to handle it
-        # For this implementation, we rely on search_flights_api's existing check.
-        daily_flights = search_flights_api(origin_airport_code, destination_airport_code, current_date_str)
-
-        if daily_flights: # search_flights_api returns [] on error or no flights
-            for flight in daily_flights:
-                # Ensure flight is a dictionary and has a 'price' before augmenting
-                if isinstance(flight, dict) and 'price' in flight and flight['price'] is not None:
-                    augmented_flight = flight.copy()
-                    augmented_flight['date'] = current_date_str
-                    all_flights_for_month.append(augmented_flight)
-                # else:
-                #     print(f"Debug: Skipping flight due to missing price or incorrect format: {flight}")
+    logger.info("Searching for all flights in %s from %s to %s...", year_month_str, origin_airport_code, destination_airport_code)
 
+    # All daily searches are network-I/O-bound and independent, so they are
+    # issued concurrently; wall time is ~max(latency) instead of sum(latency).
+    all_flights_for_month = asyncio.run(
+        _search_month_async(origin_airport_code, destination_airport_code, year, month, num_days)
+    )
 
     if not all_flights_for_month:
-        print(f"No flights found for {year_month_str} from {origin_airport_code} to {destination_airport_code}.")
+        logger.info("No flights found for %s from %s to %s.", year_month_str, origin_airport_code, destination_airport_code)
         return []
 
-    # Filter out flights without a valid price before finding the minimum
-    valid_flights_with_price = [f for f in all_flights_for_month if isinstance(f.get('price'), (int, float))]
-
-    if not valid_flights_with_price:
-        print(f"No flights with valid prices found for {year_month_str} from {origin_airport_code} to {destination_airport_code}.")
+    # Single pass: track the running minimum and its equal-price set, instead
+    # of building an intermediate filtered list and scanning it twice.
+    cheapest_flights = []
+    min_price = math.inf
+    for flight in all_flights_for_month:
+        price = flight.price
+        if not isinstance(price, (int, float)):
+            continue
+        if price < min_price:
+            min_price = price
+            cheapest_flights = [flight]
+        elif price == min_price:
+            cheapest_flights.append(flight)
+
+    if not cheapest_flights:
+        logger.info("No flights with valid prices found for %s from %s to %s.", year_month_str, origin_airport_code, destination_airport_code)
         return []
 
-    min_price = min(f['price'] for f in valid_flights_with_price)
-    cheapest_flights = [f for f in valid_flights_with_price if f['price'] == min_price]
-
-    print(f"\nFound {len(cheapest_flights)} cheapest flight(s) with price ${min_price:.2f} for {year_month_str} from {origin_airport_code} to {destination_airport_code}.")
+    logger.info("Found %d cheapest flight(s) with price $%.2f for %s from %s to %s.", len(cheapest_flights), min_price, year_month_str, origin_airport_code, destination_airport_code)
     return cheapest_flights
 
 
@@ -188,14 +593,14 @@ if __name__ == "__main__":
         print(f"\nFound {len(flights_daily)} flights for {travel_date1}:")
         for i, flight in enumerate(flights_daily):
             print(f"  Flight #{i+1}:")
-            print(f"    Airline: {flight.get('airline', 'N/A')}")
-            print(f"    Flight Number: {flight.get('flight_number', 'N/A')}")
-            price = flight.get('price', 'N/A')
+            print(f"    Airline: {flight.airline or 'N/A'}")
+            print(f"    Flight Number: {flight.flight_number or 'N/A'}")
+            price = flight.price if flight.price is not None else 'N/A'
             if isinstance(price, (int, float)):
                 print(f"    Price: ${price:.2f}")
             else:
                 print(f"    Price: {price}")
-            print(f"    Departure Time: {flight.get('departure_time', 'N/A')}")
+            print(f"    Departure Time: {flight.departure_time or 'N/A'}")
     else:
         print(f"\nNo flights found for {travel_date1} or an error occurred.")
 
@@ -223,15 +628,15 @@ if __name__ == "__main__":
         print(f"\nDetails of cheapest flights found in {search_month_str}:")
         for i, flight in enumerate(cheapest_monthly_flights):
             print(f"  Cheapest Flight Option #{i+1}:")
-            print(f"    Date: {flight.get('date', 'N/A')}")
-            print(f"    Airline: {flight.get('airline', 'N/A')}")
-            print(f"    Flight Number: {flight.get('flight_number', 'N/A')}")
-            price = flight.get('price', 'N/A')
+            print(f"    Date: {flight.date or 'N/A'}")
+            print(f"    Airline: {flight.airline or 'N/A'}")
+            print(f"    Flight Number: {flight.flight_number or 'N/A'}")
+            price = flight.price if flight.price is not None else 'N/A'
             if isinstance(price, (int, float)):
                 print(f"    Price: ${price:.2f}")
             else:
                 print(f"    Price: {price}")
-            print(f"    Departure Time: {flight.get('departure_time', 'N/A')}")
+            print(f"    Departure Time: {flight.departure_time or 'N/A'}")
     # find_cheapest_flights_in_month prints its own "no flights found" message
     elif not serpapi_key_present : # Add context if key is missing.
         print(f"\nNote: No flights found for {search_month_str}, as expected without SERPAPI_KEY or if no flights available.")
@@ -3,101 +3,277 @@
 # It includes functions to install necessary libraries, fetch flight data for a given route and date,
 # and will eventually include parsing logic to extract relevant information.
 
-import subprocess
+import asyncio
+import gzip
+import hashlib
+import os
+import random
+import time
 import re # Added for regex in parsing
+from pathlib import Path
 
-# --- Library Installation ---
-def install_libraries():
-    """
-    Installs the necessary Python libraries (requests and beautifulsoup4) using pip.
-    """
-    print("Checking and installing required libraries...")
-    try:
-        subprocess.check_call(['pip', 'install', 'requests', 'beautifulsoup4'])
-        print("Libraries installed successfully.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error installing libraries: {e}")
-        print("Please ensure pip is installed and you have internet connectivity.")
-    except Exception as ex:
-        print(f"An unexpected error occurred during library installation: {ex}")
-
-# Call install_libraries at the beginning of script execution
-install_libraries()
-
-# Now that libraries are supposedly installed, we can import them.
+# Dependencies are installed from requirements.txt; nothing is pip-installed
+# at import time anymore (the old subprocess call added seconds of cold-start
+# latency and a network dependency to every run).
 try:
-    import requests
-    from bs4 import BeautifulSoup
+    import httpx
+    import soupsieve as sv
+    from bs4 import BeautifulSoup, SoupStrainer
 except ImportError as e:
-    print(f"Failed to import required libraries after installation: {e}")
-    print("Please check your Python environment and pip installation.")
+    print(f"Failed to import required libraries: {e}")
+    print("Please install dependencies with: pip install -r requirements.txt")
     # Exit if essential libraries are missing, as the script cannot function.
     exit(1)
 
+# selectolax's lexbor backend is a C HTML5 parser that benchmarks ~10-20x
+# faster than bs4's html.parser for parse+select workloads, with a far more
+# compact node tree. Fall back to BeautifulSoup when it isn't installed.
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    _HAVE_SELECTOLAX = True
+except ImportError:
+    LexborHTMLParser = None
+    _HAVE_SELECTOLAX = False
+    print("selectolax not installed; falling back to BeautifulSoup (slower parsing).")
+
+
+class _FlightContainerStrainer(SoupStrainer):
+    """
+    Parse-time filter: only divs that can be flight containers
+    (jscontroller, role=listitem, or the hypothetical trip_card class) are
+    turned into Python objects; the rest of the page - typically >80% of a
+    Google results page - is never materialized.
+
+    Implemented via the allow_tag_creation hook (bs4 >= 4.13) because the
+    old two-argument (name, attrs) callable form was dropped in the 4.13
+    filter rewrite and crashes there.
+    """
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        if name != 'div':
+            return False
+        attrs = attrs or {}
+        classes = attrs.get('class') or ''
+        if not isinstance(classes, str):
+            classes = ' '.join(classes)
+        return (
+            'jscontroller' in attrs
+            or attrs.get('role') == 'listitem'
+            or 'trip_card' in classes
+        )
+
+
+_FLIGHT_STRAINER = _FlightContainerStrainer()
+
+# Compiled once at import so bs4 traversal skips per-call selector
+# compilation and uses soupsieve's accelerated matching. The container
+# selectors stay separate because both parse paths try them as a fallback
+# ladder (later rungs only when earlier ones match nothing), not as a union.
+_SEL_JSCONTROLLER = sv.compile('div[jscontroller]')
+_SEL_LISTITEM = sv.compile('div[role="listitem"]')
+_SEL_TRIP_CARD = sv.compile('div.trip_card')
+_SEL_PRICE = sv.compile('span.price_value')
+_SEL_AIRLINE = sv.compile('span.airline_name, div.airline_name')
+_SEL_IMG = sv.compile('img[alt]')
+
+# Price/airline text patterns, compiled once at import instead of per
+# container iteration.
+_PRICE_RE = re.compile(r'[\$\€\£]\s*\d+([.,]\d+)?')
+_AIRLINE_RE = re.compile(r'(?i)\w+\s+(Airways|Airlines|Air|Lines|Flights|SA|LLC)|Operated by')
+
+# Browser-like headers sent with every request; set once on the session so
+# the dict isn't rebuilt per call.
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.71 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9,es;q=0.8",
+    # No manual Accept-Encoding: httpx advertises exactly the codings it can
+    # decode (br only when the brotli package is installed), so we never ask
+    # Google for an encoding we'd fail to decompress.
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
+    "Connection": "keep-alive",
+    "DNT": "1",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+# Bound on how many pages may be fetched concurrently by scrape_many; keeps
+# the scraper polite so Google doesn't rate-limit the burst.
+DEFAULT_MAX_CONCURRENCY = 4
+
+# When FLIGHT_SCRAPER_DEBUG=1, fetched pages are also dumped raw to
+# debug_soup.html for selector archaeology. Production runs skip the write.
+_DEBUG = os.environ.get('FLIGHT_SCRAPER_DEBUG') == '1'
+
+# On-disk page cache: fetched pages are gzipped under _PAGE_CACHE_DIR keyed
+# by a hash of (origin, destination, date), so repeated runs (especially
+# while iterating on the parsers) skip the network entirely.
+_PAGE_CACHE_DIR = Path("./.page_cache")
+_PAGE_CACHE_TTL = 3600  # seconds; Google results go stale fast anyway
+
+
+def _page_cache_path(origin_airport_code, destination_airport_code, date):
+    """Returns the cache file path for one (origin, destination, date) query."""
+    key = hashlib.sha1(f"{origin_airport_code}|{destination_airport_code}|{date}".encode()).hexdigest()
+    return _PAGE_CACHE_DIR / f"{key}.html.gz"
+
+
+# Cache payloads start with a charset header line so a cache hit decodes the
+# page with the same encoding the original response declared.
+_PAGE_CACHE_CHARSET_PREFIX = b"charset:"
+
+
+def _page_cache_get(path):
+    """
+    Returns (page bytes, charset) if the file exists and is fresh, else None.
+    """
+    try:
+        if path.exists() and (time.time() - path.stat().st_mtime) < _PAGE_CACHE_TTL:
+            payload = gzip.decompress(path.read_bytes())
+            if payload.startswith(_PAGE_CACHE_CHARSET_PREFIX):
+                header, _, body = payload.partition(b"\n")
+                charset = header[len(_PAGE_CACHE_CHARSET_PREFIX):].decode('ascii', errors='replace')
+                return body, charset or 'utf-8'
+            # Pre-header cache file; assume utf-8 like the old reader did.
+            return payload, 'utf-8'
+    except OSError as e:
+        print(f"Could not read page cache {path}: {e}")
+    return None
+
+
+def _page_cache_set(path, raw_html, encoding):
+    """Stores page bytes plus their charset in the cache; failures are non-fatal."""
+    try:
+        _PAGE_CACHE_DIR.mkdir(exist_ok=True)
+        header = _PAGE_CACHE_CHARSET_PREFIX + (encoding or 'utf-8').encode('ascii', errors='replace') + b"\n"
+        path.write_bytes(gzip.compress(header + raw_html))
+    except OSError as e:
+        print(f"Could not write page cache {path}: {e}")
+
 
 # --- Flight Data Fetching ---
-def fetch_flight_data(origin_airport_code, destination_airport_code, date):
+async def fetch_flight_data(client, origin_airport_code, destination_airport_code, date):
     """
     Fetches and parses the HTML content of a Google Flights page
-    for a given origin, destination, and date using BeautifulSoup.
+    for a given origin, destination, and date.
 
     Args:
+        client (httpx.AsyncClient): Shared client; HTTP/2 keep-alive reuses
+            one connection across concurrent fetches.
         origin_airport_code (str): The IATA code for the origin airport (e.g., "EZE").
         destination_airport_code (str): The IATA code for the destination airport (e.g., "BCN").
         date (str): The date of the flight in YYYY-MM-DD format (e.g., "2024-12-01").
 
     Returns:
-        BeautifulSoup: A BeautifulSoup object representing the parsed HTML, or None if an error occurs.
+        LexborHTMLParser or BeautifulSoup: The parsed HTML tree (selectolax
+        when available, BeautifulSoup otherwise), or None if an error occurs.
     """
     url = f"https://www.google.com/travel/flights?q=flights%20from%20{origin_airport_code}%20to%20{destination_airport_code}%20on%20{date}"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.71 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9,es;q=0.8",
-        "Accept-Encoding": "gzip, deflate, br",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
-        "Connection": "keep-alive",
-        "DNT": "1",
-        "Upgrade-Insecure-Requests": "1",
-    }
-
-    print(f"Fetching flight data from: {url}")
-    try:
-        response = requests.get(url, headers=headers, timeout=20)
-        response.raise_for_status()
-        print("Successfully fetched page content.")
 
-        print("Parsing HTML content with BeautifulSoup...")
-        # response.text should handle content decoding (e.g. gzip)
-        soup = BeautifulSoup(response.text, "html.parser")
+    # Serve from the on-disk page cache when a fresh copy exists; repeat
+    # runs against the same query then cost zero network round-trips.
+    cache_path = _page_cache_path(origin_airport_code, destination_airport_code, date)
+    cached = _page_cache_get(cache_path)
+    if cached is not None:
+        raw_html, encoding = cached
+        print(f"Using cached page for {origin_airport_code}->{destination_airport_code} on {date}.")
+    else:
+        raw_html = None
+        encoding = 'utf-8'
+
+    try:
+        if raw_html is None:
+            print(f"Fetching flight data from: {url}")
+            # Retry 429/503 with exponential backoff + jitter (honoring
+            # Retry-After when Google sends one) instead of failing one-shot and
+            # hammering again on the next run.
+            for attempt in range(6):
+                # Stream the body so no second full copy of the page is materialized.
+                async with client.stream("GET", url, timeout=20) as response:
+                    if response.status_code in (429, 503):
+                        retry_after = response.headers.get('Retry-After')
+                        try:
+                            delay = float(retry_after)
+                        except (TypeError, ValueError):
+                            delay = min(60, (2 ** attempt) + random.uniform(0, 1))
+                        print(f"HTTP {response.status_code} from Google; retrying in {delay:.1f}s (attempt {attempt + 1}/6)...")
+                        await asyncio.sleep(delay)
+                        continue
+                    if response.status_code >= 400:
+                        # Branch on the code directly instead of raising via
+                        # raise_for_status and unpacking the exception later.
+                        print(f"HTTP error {response.status_code} for {url}; giving up on this query.")
+                        return None
+                    print("Successfully fetched page headers; streaming body...")
+                    buf = bytearray()
+                    async for chunk in response.aiter_bytes(65536):
+                        buf += chunk
+                break
+            else:
+                print(f"Giving up on {url} after 6 rate-limited attempts.")
+                return None
+            raw_html = bytes(buf)
+            encoding = response.encoding or 'utf-8'
+            _page_cache_set(cache_path, raw_html, encoding)
+
+        if _DEBUG:
+            # Dump the bytes exactly as received - no re-serialization of the
+            # parsed tree, which used to walk every node a second time.
+            Path("debug_soup.html").write_bytes(raw_html)
+            print("Saved raw page to debug_soup.html for inspection.")
+
+        if _HAVE_SELECTOLAX:
+            print("Parsing HTML content with selectolax (lexbor)...")
+            soup = LexborHTMLParser(raw_html.decode(encoding, errors='replace'))
+        else:
+            print("Parsing HTML content with BeautifulSoup (strained to flight containers)...")
+            # lxml honors the strainer fast paths that html.parser skips, and
+            # accepts the raw bytes without an intermediate str copy.
+            soup = BeautifulSoup(raw_html, "lxml", parse_only=_FLIGHT_STRAINER)
         print("HTML content parsed successfully.")
         return soup
 
-    except requests.exceptions.HTTPError as e:
-        print(f"HTTP error occurred: {e} - Status code: {e.response.status_code}")
-        if hasattr(e, 'response') and e.response is not None:
-            if e.response.status_code == 429:
-                print("Error 429: Too Many Requests. Google may be rate-limiting.")
-            elif e.response.status_code == 503:
-                print("Error 503: Service Unavailable. Google Flights might be temporarily down or blocking requests.")
-            # print(f"Response content for error: {response.text[:500]}") # Careful with this
-    except requests.exceptions.ConnectionError as e:
+    except httpx.ConnectError as e:
         print(f"Connection error occurred: {e}")
-    except requests.exceptions.Timeout as e:
+    except httpx.TimeoutException as e:
         print(f"Timeout error occurred: {e}")
-    except requests.exceptions.RequestException as e:
-        print(f"An general error occurred during the request: {e}")
+    except httpx.HTTPError as e:
+        print(f"A general error occurred during the request: {e}")
     except Exception as e:
-        print(f"An error occurred during HTML parsing with BeautifulSoup: {e}")
+        print(f"An error occurred during HTML parsing: {e}")
 
     return None
 
+
+async def scrape_many(queries, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """
+    Scrapes several (origin, destination, date) queries concurrently.
+
+    Wall time scales with ~1 round-trip instead of len(queries), since the
+    shared HTTP/2 client multiplexes the bounded-concurrency fetches over a
+    single connection.
+
+    Args:
+        queries (iterable): Tuples of (origin, destination, date).
+        max_concurrency (int): Upper bound on simultaneous fetches.
+
+    Returns:
+        list: One parsed tree (or None on failure) per query, in order.
+    """
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async with httpx.AsyncClient(http2=True, headers=_HEADERS, follow_redirects=True) as client:
+        async def one(query):
+            async with sem:
+                return await fetch_flight_data(client, *query)
+
+        return await asyncio.gather(*(one(q) for q in queries))
+
 # --- Flight Data Parsing ---
 def parse_flight_data(soup):
     """
-    Parses the BeautifulSoup object to extract flight information.
+    Parses the HTML tree to extract flight information.
     This version uses highly speculative selectors.
     Args:
-        soup (BeautifulSoup): The BeautifulSoup object containing the parsed HTML of the flight results page.
+        soup (LexborHTMLParser or BeautifulSoup): The parsed HTML of the flight results page.
     Returns:
         list: A list of dictionaries, where each dictionary contains details of a flight.
               Returns an empty list if no flight data is found or if parsing fails.
@@ -106,23 +282,120 @@ def parse_flight_data(soup):
         print("No soup object provided to parse_flight_data.")
         return []
 
-    flights_data = []
     print("\n--- Starting Flight Data Parsing Logic ---")
+    if _HAVE_SELECTOLAX and isinstance(soup, LexborHTMLParser):
+        return _parse_with_lexbor(soup)
+    return _parse_with_bs4(soup)
 
-    # HYPOTHETICAL selectors - these need to be found by inspecting actual Google Flights HTML.
-    # Using very generic selectors as placeholders.
-    # Option 1: Look for divs with jscontroller (common in Google apps)
-    flight_containers = soup.find_all('div', attrs={'jscontroller': True})
 
-    # Option 2: Fallback to divs with role="listitem" (ARIA pattern for lists)
+def _parse_with_lexbor(tree):
+    """
+    Extracts flight information from a selectolax (lexbor) tree.
+    Mirrors the heuristics of the BeautifulSoup path, but traversal and text
+    extraction run in C instead of walking Python objects per tag.
+    """
+    flights_data = []
+
+    # Same HYPOTHETICAL selector ladder as the bs4 path.
+    flight_containers = tree.css('div[jscontroller]')
     if not flight_containers:
         print("Primary selector (jscontroller) found 0 containers. Trying role='listitem'.")
-        flight_containers = soup.find_all('div', role='listitem')
+        flight_containers = tree.css('div[role="listitem"]')
+    if not flight_containers:
+        print("Secondary selector (role='listitem') found 0 containers. Trying class 'trip_card' (hypothetical).")
+        flight_containers = tree.css('div.trip_card')
+
+    print(f"Found {len(flight_containers)} potential flight container(s) using combined heuristics.")
+
+    if not flight_containers:
+        print("Could not find any elements matching the placeholder flight container selectors.")
+        print("The HTML structure might be different than expected, or the page didn't load flight results.")
+        return []
+
+    for i, container in enumerate(flight_containers):
+        print(f"\nProcessing potential flight container #{i+1} of {len(flight_containers)}")
+        flight_info = {'price': 'Not found', 'airline': 'Not found', 'details': 'Not found'}
+
+        # Price Parsing Logic (Hypothetical)
+        price_element = container.css_first('span.price_value')
+        if price_element:
+            flight_info['price'] = price_element.text(strip=True)
+        else:
+            # Fallback: scan spans/divs for text matching currency patterns.
+            # css() on a node matches the node itself first, so skip it (by
+            # mem_id; wrappers are fresh objects) - otherwise the container's
+            # whole concatenated text would win over the child node the bs4
+            # descendant scan finds.
+            for candidate in container.css('span, div'):
+                if candidate.mem_id == container.mem_id:
+                    continue
+                text = candidate.text(strip=True)
+                if text and _PRICE_RE.search(text):
+                    flight_info['price'] = text
+                    break
+        if flight_info['price'] != 'Not found':
+            print(f"  Price found: {flight_info['price']}")
+        else:
+            print("  Price element not found with current selectors/patterns.")
+
+        # Airline Parsing Logic (Hypothetical)
+        airline_element = container.css_first('span.airline_name, div.airline_name')
+        if airline_element:
+            flight_info['airline'] = airline_element.text(strip=True)
+        else:
+            # Fallback: img alt text that might contain airline names
+            img_tag = container.css_first('img[alt]')
+            alt_text = img_tag.attributes.get('alt') if img_tag else None
+            if alt_text and ('airline' in alt_text.lower() or 'logo' in alt_text.lower()):
+                flight_info['airline'] = alt_text.strip()
+            else:
+                # Fallback: spans/divs with text like "Airline", "Operated by"
+                # (again skipping the container's self-match).
+                for candidate in container.css('span, div'):
+                    if candidate.mem_id == container.mem_id:
+                        continue
+                    text = candidate.text(strip=True)
+                    if text and _AIRLINE_RE.search(text):
+                        flight_info['airline'] = text
+                        break
+        if flight_info['airline'] != 'Not found':
+            print(f"  Airline found: {flight_info['airline']}")
+        else:
+            print("  Airline element not found with current selectors/patterns.")
+
+        # Generic details from the container
+        container_text = container.text(separator=' | ', strip=True)
+        flight_info['details'] = container_text[:200] + "..." if len(container_text) > 200 else container_text
 
-    # Option 3: Fallback to a hypothetical generic class (less likely to work without knowing the class)
+        # Add to results if something specific was found, or keep a few raw entries
+        if flight_info['price'] != 'Not found' or flight_info['airline'] != 'Not found':
+            flights_data.append(flight_info)
+            print(f"  Added flight to results: Price - {flight_info['price']}, Airline - {flight_info['airline']}")
+        elif len(flights_data) < 5:
+            flights_data.append(flight_info)
+            print(f"  Added flight to results (only generic details found): {flight_info['details'][:100]}...")
+
+    print(f"\n--- Finished Flight Data Parsing. Found {len(flights_data)} entries. ---")
+    return flights_data
+
+
+def _parse_with_bs4(soup):
+    """
+    Extracts flight information from a BeautifulSoup tree (fallback path).
+    """
+    flights_data = []
+
+    # Same HYPOTHETICAL selector ladder as the lexbor path, with each rung
+    # precompiled. On a soup strained by fetch_flight_data this just
+    # re-confirms the containers; on an unstrained soup (e.g. one loaded from
+    # debug_soup.html) it does the full filtering.
+    flight_containers = _SEL_JSCONTROLLER.select(soup)
+    if not flight_containers:
+        print("Primary selector (jscontroller) found 0 containers. Trying role='listitem'.")
+        flight_containers = _SEL_LISTITEM.select(soup)
     if not flight_containers:
         print("Secondary selector (role='listitem') found 0 containers. Trying class 'trip_card' (hypothetical).")
-        flight_containers = soup.find_all('div', class_='trip_card') # Purely hypothetical
+        flight_containers = _SEL_TRIP_CARD.select(soup)
 
     print(f"Found {len(flight_containers)} potential flight container(s) using combined heuristics.")
 
@@ -139,13 +412,19 @@ def parse_flight_data(soup):
         # Price Parsing Logic (Hypothetical)
         try:
             # Try a specific (but made up) class for price
-            price_element = container.find('span', class_='price_value') # Example: <span class="price_value">$123</span>
-            if not price_element:
-                # Fallback: Find spans/divs with text matching currency patterns
-                price_element = container.find(['span', 'div'], string=re.compile(r'[\$\€\£]\s*\d+([.,]\d+)?'))
-
+            price_element = _SEL_PRICE.select_one(container) # Example: <span class="price_value">$123</span>
             if price_element:
                 flight_info['price'] = price_element.get_text(strip=True)
+            else:
+                # Fallback: scan descendant strings for currency patterns with
+                # the precompiled pattern instead of letting bs4 apply a regex
+                # to every NavigableString via find(string=...).
+                for descendant in container.descendants:
+                    if isinstance(descendant, str) and _PRICE_RE.search(descendant):
+                        flight_info['price'] = descendant.strip()
+                        break
+
+            if flight_info['price'] != 'Not found':
                 print(f"  Price found: {flight_info['price']}")
             else:
                 print("  Price element not found with current selectors/patterns.")
@@ -155,22 +434,24 @@ def parse_flight_data(soup):
         # Airline Parsing Logic (Hypothetical)
         try:
             # Try a specific (but made up) class for airline
-            airline_element = container.find(['span','div'], class_='airline_name') # Example: <span class="airline_name">Airline X</span>
-            if not airline_element:
+            airline_element = _SEL_AIRLINE.select_one(container) # Example: <span class="airline_name">Airline X</span>
+            if airline_element:
+                flight_info['airline'] = airline_element.get_text(strip=True)
+            else:
                 # Fallback: Look for img alt text that might contain airline names
-                img_tag = container.find('img', alt=True)
-                if img_tag and ('airline' in img_tag['alt'].lower() or 'logo' in img_tag['alt'].lower()):
-                    airline_element_text = img_tag['alt']
-                # Fallback: Look for spans/divs with text like "Airline", "Operated by"
+                img_tag = _SEL_IMG.select_one(container)
+                alt_text = img_tag.get('alt') if img_tag else None
+                if alt_text and ('airline' in alt_text.lower() or 'logo' in alt_text.lower()):
+                    flight_info['airline'] = alt_text.strip()
                 else:
-                    airline_element = container.find(['span','div'], string=re.compile(r'(?i)\w+\s+(Airways|Airlines|Air|Lines|Flights|SA|LLC)|Operated by'))
-
-            if airline_element: # If found by class or complex regex
-                 flight_info['airline'] = airline_element.get_text(strip=True) if hasattr(airline_element, 'get_text') else str(airline_element)
-                 print(f"  Airline found: {flight_info['airline']}")
-            elif 'airline_element_text' in locals() and airline_element_text: # from img alt
-                 flight_info['airline'] = airline_element_text.strip()
-                 print(f"  Airline found (from img alt): {flight_info['airline']}")
+                    # Fallback: descendant strings like "... Airlines" or "Operated by"
+                    for descendant in container.descendants:
+                        if isinstance(descendant, str) and _AIRLINE_RE.search(descendant):
+                            flight_info['airline'] = descendant.strip()
+                            break
+
+            if flight_info['airline'] != 'Not found':
+                print(f"  Airline found: {flight_info['airline']}")
             else:
                 print("  Airline element not found with current selectors/patterns.")
         except Exception as e:
@@ -198,13 +479,21 @@ def parse_flight_data(soup):
         print("\nFound potential flight containers, but could not extract specific price/airline information using current selectors.")
         print("This indicates that the selectors for price/airline are incorrect for the current HTML structure.")
         print("Returning raw text from first few containers as a fallback if any details were captured.")
-        for i, container in enumerate(flight_containers[:min(3, len(flight_containers))]): # Limit to first 3 or less
-             if not any(fd['details'] == (container.get_text(separator=' | ', strip=True)[:200] + "...") for fd in flights_data): # Avoid duplicates
-                flights_data.append({
-                    'price': 'Not found (final fallback)',
-                    'airline': 'Not found (final fallback)',
-                    'details': container.get_text(separator=' | ', strip=True)[:200] + "..."
-                })
+        # get_text is a recursive Python walk over the subtree, so extract it
+        # once per container and dedupe against a set instead of re-walking
+        # inside an any(...) scan.
+        seen = {fd['details'] for fd in flights_data}
+        for container in flight_containers[:3]:
+            container_text = container.get_text(separator=' | ', strip=True)
+            snippet = container_text[:200] + "..." if len(container_text) > 200 else container_text
+            if snippet in seen: # Avoid duplicates
+                continue
+            flights_data.append({
+                'price': 'Not found (final fallback)',
+                'airline': 'Not found (final fallback)',
+                'details': snippet
+            })
+            seen.add(snippet)
         if flights_data:
              print(f"Returning raw text from up to {len(flights_data)} containers as a fallback.")
     elif not flight_containers:
@@ -222,15 +511,12 @@ if __name__ == "__main__":
     # Using a date far in the future to increase likelihood of results and avoid issues with past dates.
     flight_date = "2024-12-25"
 
-    soup_object = fetch_flight_data(origin, destination, flight_date)
+    soup_object = asyncio.run(scrape_many([(origin, destination, flight_date)]))[0]
 
     if soup_object:
         print("\nSuccessfully fetched and created BeautifulSoup object.")
-
-        # For debugging, you can save the soup to a file:
-        with open("debug_soup.html", "w", encoding="utf-8") as f:
-            f.write(str(soup_object))
-        print("Saved soup to debug_soup.html for inspection.")
+        # Set FLIGHT_SCRAPER_DEBUG=1 to have fetch_flight_data dump the raw
+        # page bytes to debug_soup.html (no tree re-serialization).
 
         flight_results = parse_flight_data(soup_object)
 
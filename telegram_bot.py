@@ -2,44 +2,33 @@
 # This script implements a Telegram bot for flight alerts and search.
 # It uses the python-telegram-bot library and interacts with flight_api_client.py.
 
-import subprocess
 # --- Global Constants ---
 PRICE_THRESHOLD = 300.00  # USD
+import asyncio
+import collections
+import contextlib
+import datetime
 import os
 import logging
 import re # For input validation
+import numpy as np
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# --- Library Installation ---
-def install_telegram_bot_library():
-    """
-    Installs the python-telegram-bot library using pip.
-    """
-    print("Checking and installing python-telegram-bot library...")
-    try:
-        subprocess.check_call(['pip', 'install', 'python-telegram-bot'])
-        print("python-telegram-bot installed successfully.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error installing python-telegram-bot: {e}")
-        print("Please ensure pip is installed and you have internet connectivity.")
-        # Depending on the environment, you might want to exit here.
-        # For now, we'll let it continue, but the bot will fail if the library isn't there.
-    except Exception as ex:
-        print(f"An unexpected error occurred during library installation: {ex}")
-
-# Call install_telegram_bot_library at the beginning of script execution
-install_telegram_bot_library()
-
+# Dependencies are installed from requirements.txt; nothing is pip-installed
+# at import time anymore, so the bot cold-starts in milliseconds instead of
+# waiting on a pip subprocess every run.
 try:
     from telegram import Update
-    from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+    from telegram.ext import Application, CommandHandler, MessageHandler, PicklePersistence, filters, ContextTypes
+    from telegram.request import HTTPXRequest
     # Assuming flight_api_client.py is in the same directory
-    from flight_api_client import search_flights_api, find_cheapest_flights_in_month
+    from flight_api_client import search_flights_api, find_cheapest_flights_in_month, close_resources
 except ImportError:
-    print("Failed to import necessary libraries after installation attempt.")
-    print("Please ensure 'python-telegram-bot' is installed and 'flight_api_client.py' is accessible.")
+    print("Failed to import necessary libraries.")
+    print("Please install dependencies ('pip install -r requirements.txt') and ensure 'flight_api_client.py' is accessible.")
     exit(1)
 
 
@@ -49,8 +38,8 @@ except ImportError:
 # To deploy this bot:
 # 1. Set the TELEGRAM_BOT_TOKEN environment variable with your bot's API token.
 #    Example: export TELEGRAM_BOT_TOKEN="your_actual_token_here"
-# 2. Ensure Python and the `python-telegram-bot` library are installed on your server.
-#    (The script attempts to install `python-telegram-bot` if missing, but it's better to manage dependencies explicitly in a deployment).
+# 2. Ensure Python and the dependencies from requirements.txt are installed on your server
+#    (pip install -r requirements.txt).
 # 3. Run this script using a process manager (like systemd, supervisord, or a platform-specific one like Heroku dynos)
 #    to ensure it runs continuously and restarts on failure.
 # 4. Consider setting up proper logging instead of just print statements for production monitoring.
@@ -65,6 +54,96 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class _KeyedLocks:
+    """
+    Per-key asyncio locks that are dropped again once uncontended. A plain
+    defaultdict(asyncio.Lock) retains one lock for every key ever seen for
+    the life of the process - a slow leak on a long-running bot; here the
+    entry disappears when its last holder or waiter lets go.
+    """
+
+    def __init__(self):
+        self._locks = {}
+        self._refs = collections.Counter()
+
+    @contextlib.asynccontextmanager
+    async def lock(self, key):
+        self._refs[key] += 1
+        inner = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with inner:
+                yield
+        finally:
+            self._refs[key] -= 1
+            if not self._refs[key]:
+                del self._refs[key]
+                self._locks.pop(key, None)
+
+
+# Short-TTL memo of /search results keyed by (origin, destination, date):
+# k users asking the same route within the window cost one backend call, not
+# k. The per-key lock makes concurrent askers wait for the first fetch
+# instead of stampeding the API.
+_FLIGHT_CACHE = TTLCache(maxsize=1024, ttl=120)
+_FLIGHT_CACHE_LOCKS = _KeyedLocks()
+
+# Month searches fan out to ~30 daily API calls, so cache their results much
+# longer: a repeat /searchmonth within half an hour is answered from memory.
+_MONTH_CACHE = TTLCache(maxsize=1024, ttl=1800)
+_MONTH_CACHE_LOCKS = _KeyedLocks()
+
+# Admission control: each user gets one in-flight search at a time (extra
+# commands are answered with a "still working" notice instead of stacking
+# unbounded work), and a global cap bounds concurrent upstream searches so
+# a burst of users can't blow the flight API's rate budget.
+_USER_INFLIGHT: dict[int, asyncio.Semaphore] = {}
+_GLOBAL_SEARCH_SEM = asyncio.Semaphore(16)
+
+# Hot-path mirror of each user's price threshold: a plain dict read beats
+# going through PTB's persistence-backed user_data proxy on every /search.
+# user_data stays the durable source of truth (it survives restarts via
+# PicklePersistence); this dict is lazily filled from it.
+_USER_THRESHOLD: dict[int, float] = {}
+
+# Flight-detail templates, hoisted out of the handler loops so the literal
+# is parsed once at import instead of being rebuilt per flight.
+_FLIGHT_TMPL = (
+    "✈️ Airline: {airline}\n"
+    "   Flight: {flight_number}\n"
+    "   Price: ${price:.2f}\n"
+    "   Departs: {departure_time}"
+)
+# The month list shares one price across every flight, so the template takes
+# the already-formatted price string instead of re-running :.2f per flight.
+_MONTH_FLIGHT_TMPL = (
+    "🗓️ Date: {date}\n"
+    "✈️ Airline: {airline}\n"
+    "   Flight No: {flight_number}\n"
+    "   Price: {price_str}\n"
+    "   Departs: {departure_time}"
+)
+
+
+def _format_flight(template, flight):
+    """Renders one Flight through a precomputed template with N/A defaults."""
+    return template.format(
+        date=flight.date or 'N/A',
+        airline=flight.airline or 'N/A',
+        flight_number=flight.flight_number or 'N/A',
+        price=flight.price or 0.0,
+        departure_time=flight.departure_time or 'N/A',
+    )
+
+# Precompiled validator for "/search ORIGIN DEST YYYY-MM-DD" arguments: one
+# fullmatch replaces the chain of len()/isalpha() calls and also rejects
+# shapes like 2024-1-1 that a length check lets through.
+_SEARCH_RE = re.compile(r'([A-Z]{3}) ([A-Z]{3}) (\d{4}-\d{2}-\d{2})')
+
+# Compiled once for /searchmonth validation. _IATA_RE enforces ASCII A-Z,
+# which isalpha() did not (it accepts any unicode letter).
+_IATA_RE = re.compile(r'[A-Z]{3}')
+_YM_RE = re.compile(r'\d{4}-\d{2}')
+
 # Function to get Telegram Bot Token
 def get_telegram_token():
     """
@@ -72,11 +151,13 @@ def get_telegram_token():
     For now, it uses a hardcoded token.
     Ideally, this should come from an environment variable.
     """
-    token = os.environ.get('TELEGRAM_BOT_TOKEN')
+    # strip() defends against a trailing newline smuggled in via an env file,
+    # which would make every Telegram API call fail-retry.
+    token = (os.environ.get('TELEGRAM_BOT_TOKEN') or '').strip()
     if not token:
         # Fallback to hardcoded token for current testing, with a warning
-        logger.warning("Warning: TELEGRAM_BOT_TOKEN environment variable not set. Using hardcoded token. THIS IS NOT RECOMMENDED FOR PRODUCTION.")
-        print("Warning: TELEGRAM_BOT_TOKEN environment variable not set. Using hardcoded token. THIS IS NOT RECOMMENDED FOR PRODUCTION.") # Also print for visibility
+        # (logged once; the old duplicate print doubled startup I/O).
+        logger.warning("TELEGRAM_BOT_TOKEN environment variable not set. Using hardcoded token. THIS IS NOT RECOMMENDED FOR PRODUCTION.")
         token = "8098511672:AAEVyLLaxtFajj1S_0fIIYOghNhIiXXeMog" # The currently working token
     else:
         logger.info("Telegram token retrieved from environment variable.")
@@ -92,41 +173,74 @@ async def search_command_handler(update: Update, context: ContextTypes.DEFAULT_T
     Handles the /search command.
     Expected format: /search ORIGIN DESTINATION YYYY-MM-DD
     """
-    logger.info(f"Received /search command from user {update.effective_user.name if update.effective_user else 'Unknown'}")
+    logger.info("Received /search command from user %s", update.effective_user.name if update.effective_user else 'Unknown')
 
-    # Retrieve user-specific threshold, fallback to global PRICE_THRESHOLD
-    user_threshold = context.user_data.get('price_threshold', PRICE_THRESHOLD)
-    logger.info(f"User {update.effective_user.id} using threshold: {user_threshold}")
+    # Retrieve user-specific threshold: the in-process dict first, then the
+    # persisted user_data (seeding the dict), then the global default.
+    uid = update.effective_user.id
+    user_threshold = _USER_THRESHOLD.get(uid)
+    if user_threshold is None:
+        user_threshold = context.user_data.get('price_threshold', PRICE_THRESHOLD)
+        _USER_THRESHOLD[uid] = user_threshold
+    logger.info("User %s using threshold: %s", uid, user_threshold)
 
     args = context.args
     if not args or len(args) != 3:
         usage_message = "Usage: /search <OriginCode> <DestinationCode> <YYYY-MM-DD>"
         await update.message.reply_text(usage_message)
-        logger.warning(f"Invalid /search usage: {args}")
+        logger.warning("Invalid /search usage: %s", args)
         return
 
-    origin, destination, date_str = args[0].upper(), args[1].upper(), args[2] # Standardize airport codes to upper
-
-    # Basic validation (can be expanded, e.g., date format, IATA code structure)
-    # A simple regex could be used for date validation if needed: import re; if not re.match(r"^\d{4}-\d{2}-\d{2}$", date_str): ...
-    if not (len(origin) == 3 and origin.isalpha() and \
-            len(destination) == 3 and destination.isalpha() and \
-            len(date_str) == 10): # Basic check, not full date validation
+    # Standardize airport codes to upper, then validate all three arguments
+    # with one precompiled fullmatch.
+    match = _SEARCH_RE.fullmatch(f"{args[0].upper()} {args[1].upper()} {args[2]}")
+    if not match:
         await update.message.reply_text(
             "Invalid format for origin, destination, or date.\n"
             "Please use 3-letter IATA codes for airports and YYYY-MM-DD for date."
         )
-        logger.warning(f"Invalid argument format for /search: O={origin}, D={destination}, Date={date_str}")
+        logger.warning("Invalid argument format for /search: %s", args)
+        return
+    origin, destination, date_str = match.groups()
+
+    # Real calendar validation on top of the shape check (catches 2024-13-40).
+    try:
+        datetime.date.fromisoformat(date_str)
+    except ValueError:
+        await update.message.reply_text(f"'{date_str}' is not a valid calendar date. Please use YYYY-MM-DD.")
+        logger.warning("Invalid calendar date for /search: %s", date_str)
+        return
+
+    # Backpressure: refuse a second search while this user's previous one is
+    # still running. The slot is claimed right after the check - nothing is
+    # awaited in between - so two rapid commands can't both pass the gate.
+    user_sem = _USER_INFLIGHT.setdefault(update.effective_user.id, asyncio.Semaphore(1))
+    if user_sem.locked():
+        await update.message.reply_text("Still working on your previous request, please wait...")
+        logger.info("User %s already has a search in flight; deferring.", update.effective_user.id)
         return
+    await user_sem.acquire() # Free and uncontended here, so this never suspends
 
-    logger.info(f"Calling search_flights_api with: O={origin}, D={destination}, Date={date_str}")
+    logger.info("Calling search_flights_api with: O=%s, D=%s, Date=%s", origin, destination, date_str)
 
     try:
-        flights = search_flights_api(origin, destination, date_str) # From flight_api_client.py
+        cache_key = (origin, destination, date_str)
+        async with _GLOBAL_SEARCH_SEM, _FLIGHT_CACHE_LOCKS.lock(cache_key):
+            if cache_key in _FLIGHT_CACHE:
+                flights = _FLIGHT_CACHE[cache_key]
+                logger.info("Serving /search result from cache for %s", cache_key)
+            else:
+                # search_flights_api is synchronous (blocking HTTP); run it in
+                # a worker thread so the event loop keeps handling updates.
+                flights = await asyncio.to_thread(search_flights_api, origin, destination, date_str) # From flight_api_client.py
+                if flights is not None:
+                    _FLIGHT_CACHE[cache_key] = flights
     except Exception as e:
-        logger.error(f"Error calling search_flights_api: {e}", exc_info=True)
+        logger.error("Error calling search_flights_api: %s", e, exc_info=True)
         await update.message.reply_text("An internal error occurred while searching for flights.")
         return
+    finally:
+        user_sem.release()
 
     if flights is None: # search_flights_api might return None on error
         await update.message.reply_text(f"Error fetching flight data for {origin} to {destination} on {date_str}.")
@@ -139,44 +253,52 @@ async def search_command_handler(update: Update, context: ContextTypes.DEFAULT_T
         return
 
     # Alert logic for cheap flights
-    cheap_flights = []
-    for flight in flights:
-        try:
-            # Assuming price from API (mocked) is already a float.
-            # If it could be a string, conversion would be needed: float(flight.get('price', float('inf')))
-            price = flight.get('price')
-            if price is not None and price <= user_threshold: # Use user_threshold here
-                cheap_flights.append(flight)
-        except (ValueError, TypeError) as e:
-            logger.error(f"Error converting/comparing price for flight {flight.get('flight_number', 'Unknown')}: {e} - Price was: {flight.get('price')}")
-            continue # Skip this flight if price is invalid
+    if len(flights) >= 64:
+        # Vectorize the threshold compare for big result sets: one SIMD pass
+        # over a float64 column instead of an interpreted compare per flight.
+        # Priceless flights map to +inf so they never pass the threshold.
+        prices = np.fromiter(
+            (flight.price if flight.price is not None else np.inf for flight in flights),
+            dtype=np.float64, count=len(flights)
+        )
+        cheap_flights = [flights[i] for i in np.nonzero(prices <= user_threshold)[0]]
+    else:
+        # Flight.price is float-or-None by construction, so a comprehension
+        # with one attribute read per flight replaces the old loop with its
+        # per-item try/except frame and duplicate price lookups.
+        cheap_flights = [
+            flight for flight in flights
+            if (price := flight.price) is not None and price <= user_threshold # Use user_threshold here
+        ]
 
     if cheap_flights:
         alert_intro = f"ALERT! Found {len(cheap_flights)} cheap flight(s) (below ${user_threshold:.2f}) for {origin} to {destination} on {date_str}:\n" # Use user_threshold
-        await update.message.reply_text(alert_intro)
-        logger.info(f"Found {len(cheap_flights)} cheap flights for user {update.effective_user.id} below their threshold of ${user_threshold:.2f}. Sending alerts.")
-
-        message_parts = []
-        for flight in cheap_flights:
-            flight_detail = (
-                f"✈️ Airline: {flight.get('airline', 'N/A')}\n"
-                f"   Flight: {flight.get('flight_number', 'N/A')}\n"
-                f"   Price: ${flight.get('price', 0.0):.2f}\n"
-                f"   Departs: {flight.get('departure_time', 'N/A')}"
-            )
-            message_parts.append(flight_detail)
-
-        # Combine details into fewer messages if possible, respecting Telegram message length limits
-        combined_message = ""
+        logger.info("Found %d cheap flights for user %s below their threshold of $%.2f. Sending alerts.", len(cheap_flights), update.effective_user.id, user_threshold)
+
+        message_parts = [_format_flight(_FLIGHT_TMPL, flight) for flight in cheap_flights]
+
+        # Greedily pack details into as few messages as possible (Telegram
+        # caps messages at 4096 chars), joining each chunk once instead of
+        # growing a string += per part. The intro rides in the first chunk
+        # rather than costing its own API round-trip.
+        chunks = []
+        buf = [alert_intro + "\n"]
+        size = len(buf[0])
         for part in message_parts:
-            if len(combined_message) + len(part) + 2 > 4096: # Telegram message length limit
-                await update.message.reply_text(combined_message)
-                combined_message = part + "\n\n"
+            part = part + "\n\n"
+            if size + len(part) > 4096: # Telegram message length limit
+                chunks.append("".join(buf))
+                buf = [part]
+                size = len(part)
             else:
-                combined_message += part + "\n\n"
+                buf.append(part)
+                size += len(part)
+        if buf: # Pack any remaining part
+            chunks.append("".join(buf))
 
-        if combined_message: # Send any remaining part
-            await update.message.reply_text(combined_message)
+        # Pipeline the sends; PTB's HTTPX transport multiplexes concurrent
+        # requests over one session.
+        await asyncio.gather(*(update.message.reply_text(chunk) for chunk in chunks))
 
     else: # No cheap flights, but there were flights
         regular_flights_message = f"Found {len(flights)} flights, but none below your threshold of ${user_threshold:.2f} for {origin} to {destination} on {date_str}.\n\n" # Use user_threshold
@@ -185,155 +307,230 @@ async def search_command_handler(update: Update, context: ContextTypes.DEFAULT_T
         # Example: list first 1-2 non-cheap flights
         # for flight in flights[:2]:
         #     regular_flights_message += (
-        #         f"✈️ Airline: {flight.get('airline', 'N/A')}, Price: ${flight.get('price', 0.0):.2f}\n"
+        #         f"✈️ Airline: {flight.airline or 'N/A'}, Price: ${flight.price or 0.0:.2f}\n"
         #     )
         await update.message.reply_text(regular_flights_message)
-        logger.info(f"No flights found below user {update.effective_user.id}'s threshold of ${user_threshold:.2f}. Total flights found: {len(flights)}.")
+        logger.info("No flights found below user %s's threshold of $%.2f. Total flights found: %d.", update.effective_user.id, user_threshold, len(flights))
 
 async def set_threshold_command_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handles the /setthreshold command to set a user-specific price threshold."""
-    logger.info(f"Received /setthreshold command from user {update.effective_user.name if update.effective_user else 'Unknown'}")
+    logger.info("Received /setthreshold command from user %s", update.effective_user.name if update.effective_user else 'Unknown')
     args = context.args
 
     if not args or len(args) != 1:
         await update.message.reply_text("Usage: /setthreshold <amount>\nExample: /setthreshold 250.75")
-        logger.warning(f"Invalid /setthreshold usage: {args}")
+        logger.warning("Invalid /setthreshold usage: %s", args)
         return
 
     try:
         new_threshold = float(args[0])
         if new_threshold <= 0:
             await update.message.reply_text("Price threshold must be a positive amount.")
-            logger.warning(f"User {update.effective_user.id} tried to set non-positive threshold: {new_threshold}")
+            logger.warning("User %s tried to set non-positive threshold: %s", update.effective_user.id, new_threshold)
             return
 
         context.user_data['price_threshold'] = new_threshold
+        _USER_THRESHOLD[update.effective_user.id] = new_threshold # Keep the hot-path mirror in sync
         await update.message.reply_text(f"Your price alert threshold has been updated to ${new_threshold:.2f}.")
-        logger.info(f"User {update.effective_user.id} set price threshold to {new_threshold:.2f}")
+        logger.info("User %s set price threshold to %.2f", update.effective_user.id, new_threshold)
 
     except ValueError:
         await update.message.reply_text("Invalid amount. Please provide a number for the threshold (e.g., 250 or 199.99).")
-        logger.warning(f"User {update.effective_user.id} provided invalid threshold value: {args[0]}")
+        logger.warning("User %s provided invalid threshold value: %s", update.effective_user.id, args[0])
 
 async def search_month_command_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handles the /searchmonth command.
     Expected format: /searchmonth ORIGIN DESTINATION YYYY-MM
     """
-    logger.info(f"Received /searchmonth command from user {update.effective_user.name if update.effective_user else 'Unknown'}")
+    logger.info("Received /searchmonth command from user %s", update.effective_user.name if update.effective_user else 'Unknown')
     args = context.args
 
     if not args or len(args) != 3:
         usage_message = "Usage: /searchmonth <OriginCode> <DestinationCode> <YYYY-MM>"
         await update.message.reply_text(usage_message)
-        logger.warning(f"Invalid /searchmonth usage: {args}")
+        logger.warning("Invalid /searchmonth usage: %s", args)
         return
 
     origin, destination, year_month_str = args[0].upper(), args[1].upper(), args[2]
 
-    # Validation for airport codes and year_month_str
-    if not (len(origin) == 3 and origin.isalpha()):
+    # Validation for airport codes and year_month_str, with the precompiled
+    # module-level patterns.
+    if not _IATA_RE.fullmatch(origin):
         await update.message.reply_text("Invalid Origin Airport Code. Must be 3 alphabetic characters (e.g., JFK).")
-        logger.warning(f"Invalid origin code: {origin}")
+        logger.warning("Invalid origin code: %s", origin)
         return
-    if not (len(destination) == 3 and destination.isalpha()):
+    if not _IATA_RE.fullmatch(destination):
         await update.message.reply_text("Invalid Destination Airport Code. Must be 3 alphabetic characters (e.g., LAX).")
-        logger.warning(f"Invalid destination code: {destination}")
+        logger.warning("Invalid destination code: %s", destination)
         return
-    if not re.match(r"^\d{4}-\d{2}$", year_month_str):
+    if not _YM_RE.fullmatch(year_month_str):
         await update.message.reply_text("Invalid Year-Month format. Please use YYYY-MM (e.g., 2024-12).")
-        logger.warning(f"Invalid year-month format: {year_month_str}")
+        logger.warning("Invalid year-month format: %s", year_month_str)
         return
 
-    await update.message.reply_text(
-        f"Searching for the cheapest flights from {origin} to {destination} in {year_month_str}... "
-        "This may take a minute or two, as I'm checking every day of the month."
-    )
-    logger.info(f"Calling find_cheapest_flights_in_month with: O={origin}, D={destination}, Month={year_month_str}")
+    # Backpressure: same per-user admission control as /search, checked
+    # before the acknowledgment so a rejected command costs one reply, not
+    # two contradictory ones. Month searches are the expensive ones, so this
+    # matters most here.
+    user_sem = _USER_INFLIGHT.setdefault(update.effective_user.id, asyncio.Semaphore(1))
+    if user_sem.locked():
+        await update.message.reply_text("Still working on your previous request, please wait...")
+        logger.info("User %s already has a search in flight; deferring.", update.effective_user.id)
+        return
+    # Claim the slot before awaiting the acknowledgment; otherwise a second
+    # rapid command passes the locked() check during that await and queues
+    # on the semaphore instead of being refused.
+    await user_sem.acquire() # Free and uncontended here, so this never suspends
 
     try:
-        # This function is expected to be synchronous in flight_api_client for now.
-        # If it were async, we'd await it.
-        cheapest_flights = find_cheapest_flights_in_month(origin, destination, year_month_str)
+        await update.message.reply_text(
+            f"Searching for the cheapest flights from {origin} to {destination} in {year_month_str}... "
+            "This may take a minute or two, as I'm checking every day of the month."
+        )
+        logger.info("Calling find_cheapest_flights_in_month with: O=%s, D=%s, Month=%s", origin, destination, year_month_str)
+
+        cache_key = (origin, destination, year_month_str)
+        async with _GLOBAL_SEARCH_SEM, _MONTH_CACHE_LOCKS.lock(cache_key):
+            if cache_key in _MONTH_CACHE:
+                cheapest_flights = _MONTH_CACHE[cache_key]
+                logger.info("Serving /searchmonth result from cache for %s", cache_key)
+            else:
+                # find_cheapest_flights_in_month is synchronous (it runs its
+                # own event loop internally), so hop to a worker thread to
+                # keep this loop serving other users during the minute-long
+                # search.
+                cheapest_flights = await asyncio.to_thread(find_cheapest_flights_in_month, origin, destination, year_month_str)
+                if cheapest_flights: # Only cache successful, non-empty results
+                    _MONTH_CACHE[cache_key] = cheapest_flights
     except Exception as e:
-        logger.error(f"Error calling find_cheapest_flights_in_month: {e}", exc_info=True)
+        logger.error("Error calling find_cheapest_flights_in_month: %s", e, exc_info=True)
         await update.message.reply_text("An internal error occurred while searching for the cheapest flights.")
         return
+    finally:
+        user_sem.release()
 
     if not cheapest_flights: # Handles None or empty list
         await update.message.reply_text(f"No flights found for {origin} to {destination} in {year_month_str}.")
-        logger.info(f"No cheapest flights found by API for O={origin}, D={destination}, Month={year_month_str}")
+        logger.info("No cheapest flights found by API for O=%s, D=%s, Month=%s", origin, destination, year_month_str)
         return
 
     # Construct and send the message for cheapest flights
     # Assuming cheapest_flights is a list of flight dicts, each including 'price' and 'date'
-    min_price = cheapest_flights[0].get('price') # All flights in this list should have the same price
+    min_price = cheapest_flights[0].price # All flights in this list should have the same price
+    min_price_str = f"${min_price:.2f}" # Formatted once; every flight below shares it
 
     response_message = (
-        f"🎉 Hooray! The cheapest price found for {origin} to {destination} in {year_month_str} is ${min_price:.2f}.\n"
+        f"🎉 Hooray! The cheapest price found for {origin} to {destination} in {year_month_str} is {min_price_str}.\n"
         f"Here are the flight(s) at this price:\n\n"
     )
 
-    logger.info(f"Found {len(cheapest_flights)} cheapest flights for O={origin}, D={destination}, Month={year_month_str} at price ${min_price:.2f}")
+    logger.info("Found %d cheapest flights for O=%s, D=%s, Month=%s at price %s", len(cheapest_flights), origin, destination, year_month_str, min_price_str)
 
-    message_parts = []
-    for flight in cheapest_flights:
-        flight_detail = (
-            f"🗓️ Date: {flight.get('date', 'N/A')}\n"
-            f"✈️ Airline: {flight.get('airline', 'N/A')}\n"
-            f"   Flight No: {flight.get('flight_number', 'N/A')}\n"
-            f"   Price: ${flight.get('price', 0.0):.2f}\n" # Should be min_price
-            f"   Departs: {flight.get('departure_time', 'N/A')}"
+    message_parts = [
+        _MONTH_FLIGHT_TMPL.format(
+            date=flight.date or 'N/A',
+            airline=flight.airline or 'N/A',
+            flight_number=flight.flight_number or 'N/A',
+            price_str=min_price_str,
+            departure_time=flight.departure_time or 'N/A',
         )
-        message_parts.append(flight_detail)
-
-    # Combine details into messages, respecting Telegram message length limits
-    current_message = response_message
-    for i, part in enumerate(message_parts):
-        if len(current_message) + len(part) + 2 > 4096: # Telegram message length limit
-            await update.message.reply_text(current_message)
-            current_message = part + "\n\n"
+        for flight in cheapest_flights
+    ]
+
+    # Safety cap: don't spam more than ~30 flights; summarize the rest.
+    if len(message_parts) > 30:
+        remainder = len(message_parts) - 30
+        message_parts = message_parts[:30]
+        message_parts.append(f"...and {remainder} more similar flights.")
+
+    # Greedily pack details into 4096-char messages (joined once each), with
+    # the summary header riding in the first chunk instead of costing its own
+    # API round-trip.
+    chunks = []
+    buf = [response_message]
+    size = len(response_message)
+    for part in message_parts:
+        part = part + "\n\n"
+        if size + len(part) > 4096: # Telegram message length limit
+            chunks.append("".join(buf))
+            buf = [part]
+            size = len(part)
         else:
-            current_message += part + "\n\n"
-
-        # Safety break if there are too many flights to list to avoid spamming (e.g., > 10 messages)
-        if i > 28 and len(message_parts) > 30 : # Approx 3 flights per message, limit to ~10 messages
-             current_message += f"...and {len(message_parts) - (i+1)} more similar flights."
-             break
-
+            buf.append(part)
+            size += len(part)
+    if buf: # Pack any remaining part
+        chunks.append("".join(buf))
 
-    if current_message: # Send any remaining part
-        await update.message.reply_text(current_message)
+    # Pipeline the sends: every chunk's request is started up front so the
+    # ~100ms Telegram round-trips overlap, while awaiting in order keeps the
+    # date list reading top to bottom.
+    send_tasks = [asyncio.create_task(update.message.reply_text(chunk)) for chunk in chunks]
+    for task in send_tasks:
+        await task
 
 
 # --- Message Handlers ---
+# Built once at import; echo_handler used to reassemble this on every
+# non-command message.
+_HELP_TEXT = (
+    "I'm a flight bot. Here's how to use me:\n"
+    "  - `/search <Origin> <Destination> <YYYY-MM-DD>`\n"
+    "    (Example: /search JFK LAX 2024-12-24)\n"
+    "    Searches for flights on a specific date.\n\n"
+    "  - `/searchmonth <Origin> <Destination> <YYYY-MM>`\n"
+    "    (Example: /searchmonth JFK LAX 2024-12)\n"
+    "    Finds the cheapest flights in a specific month.\n\n"
+    "  - `/setthreshold <amount>`\n"
+    "    (Example: /setthreshold 250.50)\n"
+    "    Sets your price alert threshold for the /search command."
+)
+
 async def echo_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handles non-command text messages by providing usage instructions."""
-    logger.info(f"Received non-command message from user {update.effective_user.name if update.effective_user else 'Unknown'}. Replying with help text.")
-    help_text = (
-        "I'm a flight bot. Here's how to use me:\n"
-        "  - `/search <Origin> <Destination> <YYYY-MM-DD>`\n"
-        "    (Example: /search JFK LAX 2024-12-24)\n"
-        "    Searches for flights on a specific date.\n\n"
-        "  - `/searchmonth <Origin> <Destination> <YYYY-MM>`\n"
-        "    (Example: /searchmonth JFK LAX 2024-12)\n"
-        "    Finds the cheapest flights in a specific month.\n\n"
-        "  - `/setthreshold <amount>`\n"
-        "    (Example: /setthreshold 250.50)\n"
-        "    Sets your price alert threshold for the /search command."
-    )
-    await update.message.reply_text(help_text)
+    logger.info("Received non-command message from user %s. Replying with help text.", update.effective_user.name if update.effective_user else 'Unknown')
+    # disable_web_page_preview skips Telegram's server-side URL resolution.
+    await update.message.reply_text(_HELP_TEXT, disable_web_page_preview=True)
+
+async def _on_post_shutdown(application: Application):
+    """Releases flight_api_client's pooled HTTP session and disk cache."""
+    close_resources()
+    logger.info("Flight API client resources closed.")
 
 # --- Main Bot Logic ---
 def main():
     """Starts the Telegram bot."""
+    # uvloop's C event loop cuts asyncio overhead ~2-4x for an I/O-bound bot
+    # like this one; installing the policy before the Application is built
+    # means run_polling and every handler transparently run on it.
+    try:
+        import uvloop
+        uvloop.install()
+        logger.info("uvloop installed as the asyncio event loop policy.")
+    except ImportError:
+        pass  # Stock asyncio works fine, just slower (e.g. on Windows).
+
     TELEGRAM_BOT_TOKEN = get_telegram_token()
     if not TELEGRAM_BOT_TOKEN:
         logger.critical("TELEGRAM BOT TOKEN IS NOT SET. BOT CANNOT START.")
         return
 
     logger.info("Building application...")
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    # Persist user_data (e.g. /setthreshold values) across restarts so users
+    # don't lose their settings and re-trigger expensive searches.
+    persistence = PicklePersistence(filepath='bot_state.pkl')
+    # A bigger connection pool lets the gathered reply_text batches (and
+    # concurrent users) actually run in parallel instead of queueing on
+    # PTB's default single-connection transport.
+    request = HTTPXRequest(connection_pool_size=20)
+    application = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .persistence(persistence)
+        .request(request)
+        .post_shutdown(_on_post_shutdown)
+        .build()
+    )
 
     # Register command handlers
     application.add_handler(CommandHandler("search", search_command_handler))
@@ -349,9 +546,19 @@ def main():
 
     logger.info("Starting bot polling...")
     try:
-        application.run_polling()
+        # Long-poll getUpdates for 30s at a time with no pause between
+        # polls: one held request replaces many short ones, cutting idle
+        # CPU wake-ups and outbound HTTPS. Pending backlog from downtime is
+        # dropped so restarts reach steady state without a replay burst.
+        application.run_polling(
+            timeout=30,
+            poll_interval=0.0,
+            bootstrap_retries=-1,
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=True,
+        )
     except Exception as e:
-        logger.critical(f"Bot crashed with error: {e}", exc_info=True)
+        logger.critical("Bot crashed with error: %s", e, exc_info=True)
 
 if __name__ == "__main__":
     logger.info("Bot script started.")